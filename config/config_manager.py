@@ -1,28 +1,69 @@
 """
 Configuration Manager for handling environment-specific settings.
 """
-import json
 import os
 import logging
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping
 from pathlib import Path
+from utils.dict_utils import flatten
+from utils.json_utils import loads
+from utils.paths import PROJECT_ROOT
 
 logger = logging.getLogger(__name__)
 
 
+def _freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Return a mutable deep copy of a container value; scalars pass through."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
+
+
+@lru_cache(maxsize=8)
+def _load_json_cached(path_str: str, mtime_ns: int) -> Mapping[str, Any]:
+    """Read and parse a JSON file once per (path, mtime) pair.
+    
+    The result is shared between ConfigManager instances, so it is frozen
+    all the way down; get() hands out mutable copies of subtrees.
+    """
+    return _freeze(loads(Path(path_str).read_bytes()))
+
+
 class ConfigManager:
     """Manages configuration and environment settings."""
     
+    # Resolved once at import time and shared by all instances
+    _PROJECT_ROOT = PROJECT_ROOT
+    _CONFIG_DIR = _PROJECT_ROOT / "config"
+    _TEST_DATA_DIR = _PROJECT_ROOT / "test_data"
+    _ENVIRONMENTS_DIR = _TEST_DATA_DIR / "environments"
+    _TEST_DATA_FILE = _TEST_DATA_DIR / "test_data.json"
+    
     def __init__(self, environment: str = None):
-        self.project_root = Path(__file__).parent.parent
-        self.config_dir = self.project_root / "config"
-        self.test_data_dir = self.project_root / "test_data"
-        self.environments_dir = self.test_data_dir / "environments"
+        self.project_root = self._PROJECT_ROOT
+        self.config_dir = self._CONFIG_DIR
+        self.test_data_dir = self._TEST_DATA_DIR
+        self.environments_dir = self._ENVIRONMENTS_DIR
         
         # Determine environment from env variable or default to dev
         self.environment = environment or os.getenv("TEST_ENV", "dev")
-        self.config: Dict[str, Any] = {}
-        self.test_data: Dict[str, Any] = {}
+        self.config: Mapping[str, Any] = {}
+        self.test_data: Mapping[str, Any] = {}
+        self._flat_config: Dict[str, Any] = {}
+        self._flat_test_data: Dict[str, Any] = {}
         
         self._load_config()
         self._load_test_data()
@@ -32,8 +73,7 @@ class ConfigManager:
         try:
             env_file = self.environments_dir / f"{self.environment}.json"
             if env_file.exists():
-                with open(env_file, 'r') as f:
-                    self.config = json.load(f)
+                self.config = _load_json_cached(str(env_file), env_file.stat().st_mtime_ns)
                 logger.info(f"Loaded configuration for environment: {self.environment}")
             else:
                 logger.warning(f"Config file not found: {env_file}, using defaults")
@@ -41,14 +81,14 @@ class ConfigManager:
         except Exception as error:
             logger.error(f"Error loading config: {error}")
             self.config = self._get_default_config()
+        self._flat_config = flatten(self.config)
     
     def _load_test_data(self):
         """Load test data from JSON file."""
         try:
-            test_data_file = self.test_data_dir / "test_data.json"
+            test_data_file = self._TEST_DATA_FILE
             if test_data_file.exists():
-                with open(test_data_file, 'r') as f:
-                    self.test_data = json.load(f)
+                self.test_data = _load_json_cached(str(test_data_file), test_data_file.stat().st_mtime_ns)
                 logger.info("Test data loaded successfully")
             else:
                 logger.warning(f"Test data file not found: {test_data_file}")
@@ -56,6 +96,7 @@ class ConfigManager:
         except Exception as error:
             logger.error(f"Error loading test data: {error}")
             self.test_data = {}
+        self._flat_test_data = flatten(self.test_data)
     
     def _get_default_config(self) -> Dict[str, Any]:
         """Get default configuration."""
@@ -67,34 +108,20 @@ class ConfigManager:
             "headless": True,
             "browser": "chromium",
             "viewport": {"width": 1280, "height": 720},
-            "mcp": {"enabled": True}
+            "block_media": False,
+            "mcp": {"enabled": True},
+            "screenshots": {"per_step": False, "keywords": ["when", "then"]}
         }
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value by key (supports dot notation)."""
-        keys = key.split('.')
-        value = self.config
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-                if value is None:
-                    return default
-            else:
-                return default
-        return value if value is not None else default
+        value = self._flat_config.get(key)
+        return _thaw(value) if value is not None else default
     
     def get_test_data(self, key: str, default: Any = None) -> Any:
         """Get test data value by key (supports dot notation)."""
-        keys = key.split('.')
-        value = self.test_data
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-                if value is None:
-                    return default
-            else:
-                return default
-        return value if value is not None else default
+        value = self._flat_test_data.get(key)
+        return _thaw(value) if value is not None else default
     
     def get_base_url(self) -> str:
         """Get base URL for current environment."""
@@ -116,7 +143,23 @@ class ConfigManager:
         """Get viewport dimensions."""
         return self.get("viewport", {"width": 1280, "height": 720})
     
+    def should_block_media(self) -> bool:
+        """Check if images, fonts and media requests should be blocked."""
+        return self.get("block_media", False)
+    
     def is_mcp_enabled(self) -> bool:
         """Check if MCP is enabled."""
         return self.get("mcp.enabled", True)
+    
+    def get_mcp_pool_size(self) -> int:
+        """Get the number of pooled MCP RPC sessions."""
+        return self.get("mcp.conn_pool_max_size", 1)
+    
+    def is_step_screenshots_enabled(self) -> bool:
+        """Check if a screenshot should be captured after every step."""
+        return self.get("screenshots.per_step", False)
+    
+    def get_step_screenshot_keywords(self) -> List[str]:
+        """Get step types (given/when/then) captured by per-step screenshots."""
+        return [keyword.lower() for keyword in self.get("screenshots.keywords", ["when", "then"])]
 
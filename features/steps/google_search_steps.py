@@ -2,48 +2,30 @@
 Step definitions for Google Search feature.
 """
 import logging
-import asyncio
 from behave import given, when, then, step
-from pages.google_search_page import GoogleSearchPage
 
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    """Helper to run async functions in sync context."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coro)
+def run_async(context, coro):
+    """Helper to run async functions on the run-wide event loop."""
+    return context._loop.run_until_complete(coro)
 
 
 @given('I navigate to Google')
 def step_navigate_to_google(context):
     """Navigate to Google homepage."""
     try:
-        # Ensure world is initialized
-        if not hasattr(context, 'world') or context.world is None:
-            from features.support.world import CustomWorld
-            import asyncio
-            context.world = CustomWorld(context)
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            loop.run_until_complete(context.world.init_browser())
-            loop.run_until_complete(context.world.init_mcp())
+        assert context.world is not None, "before_scenario did not initialize world"
         
         # Use test data for URL if available
         url = context.world.test_data.get_url("google") or context.world.base_url
-        google_page = GoogleSearchPage(context.world.page, context.world.config)
-        run_async(google_page.navigate(url))
-        context.google_page = google_page
-        logger.info(f"Successfully navigated to {url}")
+        # Any summary taken before this navigation describes another page
+        context.search_summary = None
+        run_async(context, context.google_page.navigate(url))
+        logger.info("Successfully navigated to %s", url)
     except Exception as error:
-        logger.error(f"Error navigating to Google: {error}")
+        logger.error("Error navigating to Google: %s", error)
         raise
 
 
@@ -55,26 +37,25 @@ def step_search_for_keyword(context, keyword):
         test_data_keyword = context.world.test_data.get_search_keyword(keyword.lower())
         if test_data_keyword and test_data_keyword != keyword.lower():
             keyword = test_data_keyword
-            logger.info(f"Using keyword from test data: {keyword}")
+            logger.info("Using keyword from test data: %s", keyword)
         
         # Optionally fetch keyword from MCP for dynamic data
-        if context.world.mcp_client and context.world.mcp_client.is_connected():
+        if context.world._mcp_connected:
             mcp_data = run_async(
+                context,
                 context.world.mcp_client.fetch_dynamic_data("search_keyword")
             )
             if mcp_data.get("keyword"):
                 keyword = mcp_data["keyword"]
-                logger.info(f"Using keyword from MCP: {keyword}")
-        
-        # Perform search
-        if not hasattr(context, 'google_page'):
-            context.google_page = GoogleSearchPage(context.world.page, context.world.config)
+                logger.info("Using keyword from MCP: %s", keyword)
         
-        run_async(context.google_page.search(keyword))
+        # Perform search; any earlier summary describes the previous page
+        context.search_summary = None
+        run_async(context, context.google_page.search(keyword))
         context.search_keyword = keyword
-        logger.info(f"Search completed for keyword: {keyword}")
+        logger.info("Search completed for keyword: %s", keyword)
     except Exception as error:
-        logger.error(f"Error performing search: {error}")
+        logger.error("Error performing search: %s", error)
         raise
 
 
@@ -82,16 +63,14 @@ def step_search_for_keyword(context, keyword):
 def step_verify_search_results_displayed(context):
     """Verify that search results are displayed."""
     try:
-        if not hasattr(context, 'google_page'):
-            context.google_page = GoogleSearchPage(context.world.page)
+        # Title is fetched alongside so the title step can reuse it
+        context.search_summary = run_async(context, context.google_page.get_search_summary())
+        results_displayed = context.search_summary["results_displayed"]
         
-        results_displayed = run_async(
-            context.google_page.are_search_results_displayed()
-        )
-        
-        # Report to MCP
+        # Report to MCP now so the result carries this step's timestamp
         if context.world.mcp_client:
             run_async(
+                context,
                 context.world.mcp_client.report_test_result(
                     "verify_search_results",
                     "passed" if results_displayed else "failed",
@@ -105,10 +84,10 @@ def step_verify_search_results_displayed(context):
         assert results_displayed, "Search results are not displayed"
         logger.info("Search results verification passed")
     except AssertionError as error:
-        logger.error(f"Assertion failed: {error}")
+        logger.error("Assertion failed: %s", error)
         raise
     except Exception as error:
-        logger.error(f"Error verifying search results: {error}")
+        logger.error("Error verifying search results: %s", error)
         raise
 
 
@@ -116,31 +95,35 @@ def step_verify_search_results_displayed(context):
 def step_verify_page_title_contains(context, expected_text):
     """Verify that the page title contains the expected text."""
     try:
-        if not hasattr(context, 'google_page'):
-            context.google_page = GoogleSearchPage(context.world.page)
-        
-        page_title = run_async(context.google_page.get_page_title())
+        # Reuse the title from the results step only if still on that page
+        summary = getattr(context, 'search_summary', None)
+        if summary is not None and summary["url"] == context.google_page.page.url:
+            page_title = summary["title"]
+        else:
+            page_title = run_async(context, context.google_page.get_page_title())
         
         # Get validation criteria from test data
         validation_criteria = context.world.test_data.get_validation_criteria()
         if validation_criteria.get("title_contains") and isinstance(validation_criteria["title_contains"], str):
             expected_text = validation_criteria["title_contains"]
-            logger.info(f"Using validation criteria from test data: {expected_text}")
+            logger.info("Using validation criteria from test data: %s", expected_text)
         
         # Optionally fetch validation criteria from MCP (overrides test data)
-        if context.world.mcp_client and context.world.mcp_client.is_connected():
+        if context.world._mcp_connected:
             validation_data = run_async(
+                context,
                 context.world.mcp_client.fetch_dynamic_data("validation_criteria")
             )
             if validation_data.get("title_contains"):
                 expected_text = validation_data["title_contains"]
-                logger.info(f"Using validation criteria from MCP: {expected_text}")
+                logger.info("Using validation criteria from MCP: %s", expected_text)
         
         title_contains_text = expected_text.lower() in page_title.lower()
         
-        # Report to MCP
+        # Report to MCP now so the result carries this step's timestamp
         if context.world.mcp_client:
             run_async(
+                context,
                 context.world.mcp_client.report_test_result(
                     "verify_page_title",
                     "passed" if title_contains_text else "failed",
@@ -155,11 +138,11 @@ def step_verify_page_title_contains(context, expected_text):
         assert title_contains_text, (
             f"Page title '{page_title}' does not contain '{expected_text}'"
         )
-        logger.info(f"Page title verification passed: '{expected_text}' found in '{page_title}'")
+        logger.info("Page title verification passed: '%s' found in '%s'", expected_text, page_title)
     except AssertionError as error:
-        logger.error(f"Assertion failed: {error}")
+        logger.error("Assertion failed: %s", error)
         raise
     except Exception as error:
-        logger.error(f"Error verifying page title: {error}")
+        logger.error("Error verifying page title: %s", error)
         raise
 
@@ -1,19 +1,53 @@
 """
 Behave hooks for test setup and teardown.
 """
+import asyncio
 import logging
-import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
 from behave import before_all, after_all, before_scenario, after_scenario, after_step
-from playwright.sync_api import sync_playwright
-from config.config_manager import ConfigManager
+
+if TYPE_CHECKING:
+    from features.support.world import CustomWorld
 
 logger = logging.getLogger(__name__)
 
+# Behave would run every hook twice if this module were registered again
+# (e.g. a stale copy being reloaded), so fail loudly instead.
+if getattr(sys.modules.get(__name__), '_loaded', False):
+    raise RuntimeError(f"Hooks module {__name__} was loaded twice")
+_loaded = True
+
+# Characters replaced when turning step names into screenshot filenames
+_SANITIZE = str.maketrans({' ': '_', '"': '', '/': '_'})
+
+# Screenshot timestamps have second resolution, so the formatted string is
+# reused for up to a second instead of calling strftime on every step.
+_last_ts_check = 0.0
+_cached_ts = ''
+
+
+def _screenshot_timestamp() -> str:
+    """Return the current time formatted for screenshot filenames."""
+    global _last_ts_check, _cached_ts
+    now = time.monotonic()
+    if now - _last_ts_check >= 1:
+        _cached_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+        _last_ts_check = now
+    return _cached_ts
+
 
 @before_all
 def before_all_hook(context):
     """Initialize MCP client and install Playwright browsers."""
+    # Heavy imports are deferred until the run actually starts
+    from playwright.sync_api import sync_playwright
+    from config.config_manager import ConfigManager
+    
     logger.info("=" * 80)
     logger.info("Starting test suite...")
     logger.info("=" * 80)
@@ -21,27 +55,59 @@ def before_all_hook(context):
     # Load configuration
     env = context.config.userdata.get('environment', 'dev')
     context.config_manager = ConfigManager(environment=env)
-    logger.info(f"Environment: {context.config_manager.environment}")
-    logger.info(f"Base URL: {context.config_manager.get_base_url()}")
+    logger.info("Environment: %s", context.config_manager.environment)
+    logger.info("Base URL: %s", context.config_manager.get_base_url())
     
-    # Ensure reports and screenshots directories exist
-    os.makedirs('reports', exist_ok=True)
-    os.makedirs('reports/screenshots', exist_ok=True)
+    # Ensure reports and screenshots directories exist (once per run)
+    context._screens_dir = Path('reports') / 'screenshots'
+    context._screens_dir.mkdir(parents=True, exist_ok=True)
     
     # Initialize screenshot list for the test run
     context.screenshots = []
     
-    # Install Playwright browsers if not already installed
+    # Step types that get a screenshot when per-step capture is enabled
+    if context.config_manager.is_step_screenshots_enabled():
+        context._capture_step_types = frozenset(
+            context.config_manager.get_step_screenshot_keywords()
+        )
+    else:
+        context._capture_step_types = frozenset()
+    
+    # Screenshot bytes are written to disk off the main thread (future -> path)
+    context._screen_executor = ThreadPoolExecutor(max_workers=2)
+    context._screen_futures = {}
+    
+    # Single event loop shared by all hooks and steps for the whole run
+    context._loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(context._loop)
+    
+    # Install Playwright browsers if not already installed. The check launches
+    # a browser, so its success is cached per Playwright version.
     try:
-        logger.info("Checking Playwright browser installation...")
-        with sync_playwright() as p:
-            # This will trigger browser installation if needed
-            browser = p.chromium.launch(headless=True)
-            browser.close()
-        logger.info("Playwright browsers are ready")
-    except Exception as error:
-        logger.warning(f"Playwright browser check failed: {error}")
-        logger.info("You may need to run: playwright install")
+        import playwright
+        marker = Path.home() / '.cache' / 'pwmcp' / f'browsers_ok_{playwright.__version__}'
+    except Exception:
+        marker = None
+    
+    if marker is not None and marker.exists():
+        logger.info("Playwright browsers are ready (cached check)")
+    else:
+        try:
+            logger.info("Checking Playwright browser installation...")
+            with sync_playwright() as p:
+                # This will trigger browser installation if needed
+                browser = p.chromium.launch(headless=True)
+                browser.close()
+            logger.info("Playwright browsers are ready")
+            if marker is not None:
+                try:
+                    marker.parent.mkdir(parents=True, exist_ok=True)
+                    marker.touch()
+                except OSError as error:
+                    logger.debug("Could not write browser check marker: %s", error)
+        except Exception as error:
+            logger.warning("Playwright browser check failed: %s", error)
+            logger.info("You may need to run: playwright install")
 
 
 @after_all
@@ -51,61 +117,100 @@ def after_all_hook(context):
     logger.info("Test suite completed.")
     logger.info("=" * 80)
     
+    # Make sure all screenshots are on disk before building reports, and keep
+    # failed writes out of the report so it never links to missing files
+    wait(context._screen_futures)
+    context._screen_executor.shutdown()
+    failed_paths = set()
+    for future, screenshot_path in context._screen_futures.items():
+        error = future.exception()
+        if error is not None:
+            logger.error("Could not write screenshot %s: %s", screenshot_path, error)
+            failed_paths.add(screenshot_path)
+    if failed_paths:
+        context.screenshots = [
+            info for info in context.screenshots if info['path'] not in failed_paths
+        ]
+    
     # Generate timestamped reports
+    report_writes = []
     if hasattr(context, 'world') and context.world:
+        # Formatted once and shared by the reports and the summary below
+        test_results = []
+        if context.world.mcp_client:
+            test_results = context.world.mcp_client.get_test_results()
+        
         # Generate HTML report
-        if hasattr(context.world, 'report_generator'):
-            test_results = []
-            if context.world.mcp_client:
-                test_results = context.world.mcp_client.get_test_results()
-            
-            if test_results:
-                # Get screenshots from context
-                screenshots = getattr(context, 'screenshots', [])
-                html_report = context.world.report_generator.generate_html_report(
+        if test_results and hasattr(context.world, 'report_generator'):
+            # Get screenshots from context
+            screenshots = getattr(context, 'screenshots', [])
+            report_generator = context.world.report_generator
+            report_writes = [
+                report_generator.generate_html_report_async(
                     test_results, "Google Search Automation", screenshots
-                )
-                json_report = context.world.report_generator.generate_json_report(test_results)
-                logger.info(f"Reports generated: {html_report}, {json_report}")
-                if screenshots:
-                    logger.info(f"Report includes {len(screenshots)} screenshots")
+                ),
+                report_generator.generate_json_report_async(test_results),
+            ]
+            if screenshots:
+                logger.info("Report includes %s screenshots", len(screenshots))
         
         # Generate summary report if MCP client was used
-        if context.world.mcp_client:
-            results = context.world.mcp_client.get_test_results()
-            if results:
-                logger.info(f"Total test results collected: {len(results)}")
+        if test_results:
+            logger.info("Total test results collected: %s", len(test_results))
+    
+    # Write the reports while closing the browser and MCP connection shared by
+    # all scenarios; shutdown() also sends the queued test results to MCP in bulk
+    from features.support.mcp_client import MCPClient
+    from features.support.world import BrowserPool
+    # return_exceptions so a failed report write cannot leave teardown pending
+    outcomes = context._loop.run_until_complete(
+        asyncio.gather(*report_writes, BrowserPool.close(), MCPClient.shutdown(),
+                       return_exceptions=True)
+    )
+    report_paths = []
+    for outcome in outcomes[:len(report_writes)]:
+        if isinstance(outcome, BaseException):
+            logger.error("Error generating report: %s", outcome)
+        else:
+            report_paths.append(outcome)
+    for outcome in outcomes[len(report_writes):]:
+        if isinstance(outcome, BaseException):
+            logger.error("Error during teardown: %s", outcome)
+    if report_paths:
+        logger.info("Reports generated: %s", ", ".join(report_paths))
+    
+    context._loop.close()
 
 
 @before_scenario
 def before_scenario_hook(context, scenario):
     """Initialize browser context before each scenario."""
-    logger.info(f"\n{'=' * 80}")
-    logger.info(f"Scenario: {scenario.name}")
-    logger.info(f"{'=' * 80}")
+    logger.info("\n%s", '=' * 80)
+    logger.info("Scenario: %s", scenario.name)
+    logger.info("=" * 80)
     
     # Initialize screenshot list for scenario
     if not hasattr(context, 'screenshots'):
         context.screenshots = []
     context.scenario_screenshots = []
+    context._scenario_name = scenario.name.replace(' ', '_')[:30]
     
     # Initialize custom world
     if not hasattr(context, 'world'):
         from features.support.world import CustomWorld
         context.world = CustomWorld(context)
     
-    # Initialize browser
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    # Initialize browser and MCP client concurrently
+    loop = context._loop
+    loop.run_until_complete(context.world.init())
     
-    loop.run_until_complete(context.world.init_browser())
+    # Page object shared by all steps of the scenario
+    from pages.google_search_page import GoogleSearchPage
+    context.google_page = GoogleSearchPage(context.world.page, context.world.config)
     
-    # Initialize MCP client
-    loop.run_until_complete(context.world.init_mcp())
+    context.world._mcp_connected = bool(
+        context.world.mcp_client and context.world.mcp_client.is_connected()
+    )
     
     # Start test orchestration via MCP
     if context.world.mcp_client:
@@ -117,12 +222,7 @@ def before_scenario_hook(context, scenario):
 @after_scenario
 def after_scenario_hook(context, scenario):
     """Cleanup browser and capture screenshots on failure."""
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    loop = context._loop
     
     # Capture screenshot on failure
     if scenario.status == 'failed' and context.world.page:
@@ -131,7 +231,7 @@ def after_scenario_hook(context, scenario):
             loop.run_until_complete(
                 context.world.page.screenshot(path=screenshot_path)
             )
-            logger.info(f"Screenshot saved: {screenshot_path}")
+            logger.info("Screenshot saved: %s", screenshot_path)
             
             # Report failure to MCP
             if context.world.mcp_client:
@@ -144,7 +244,7 @@ def after_scenario_hook(context, scenario):
                     )
                 )
         except Exception as error:
-            logger.error(f"Error capturing screenshot: {error}")
+            logger.error("Error capturing screenshot: %s", error)
     elif scenario.status == 'passed' and context.world.mcp_client:
         # Report success to MCP
         loop.run_until_complete(
@@ -162,9 +262,9 @@ def after_scenario_hook(context, scenario):
         )
     
     # Cleanup browser
-    loop.run_until_complete(context.world.cleanup())
+    loop.run_until_complete(context.world.cleanup(save_state=scenario.status == 'passed'))
     
-    logger.info(f"Scenario {scenario.status}: {scenario.name}")
+    logger.info("Scenario %s: %s", scenario.status, scenario.name)
     
     # Store scenario screenshots in context
     if hasattr(context, 'scenario_screenshots'):
@@ -173,32 +273,39 @@ def after_scenario_hook(context, scenario):
 
 @after_step
 def after_step_hook(context, step):
-    """Capture screenshot after each step, especially for navigation steps."""
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    """Capture a screenshot after a step when enabled or when the step failed."""
+    # Per-step capture is opt-in and sampled by step type (given/when/then);
+    # failed steps are always captured
+    step_failed = step.status == 'failed'
+    if not (step_failed or (step.status == 'passed' and step.step_type in context._capture_step_types)):
+        return
+    
+    loop = context._loop
     
-    # Only capture screenshots if page is available and step passed
     if hasattr(context, 'world') and context.world and context.world.page:
         try:
             # Create screenshot filename based on step
-            step_name = step.name.replace(' ', '_').replace('"', '').replace('/', '_')[:50]
-            scenario_name = step.scenario.name.replace(' ', '_')[:30] if hasattr(step, 'scenario') else 'unknown'
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            step_name = step.name.translate(_SANITIZE)[:50]
+            scenario_name = getattr(context, '_scenario_name', 'unknown')
+            timestamp = _screenshot_timestamp()
+            extension = 'png' if step_failed else 'jpg'
             
-            screenshot_filename = f"screenshot_{scenario_name}_{step_name}_{timestamp}.png"
-            screenshot_path = os.path.join('reports', 'screenshots', screenshot_filename)
+            screenshot_filename = f"screenshot_{scenario_name}_{step_name}_{timestamp}.{extension}"
+            screenshot_path = str(context._screens_dir / screenshot_filename)
             
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(screenshot_path), exist_ok=True)
+            # Take screenshot: full-page PNG for failures, JPEG otherwise. Only
+            # assertion ("then") steps pay for a full-page capture.
+            if step_failed:
+                screenshot = context.world.page.screenshot(full_page=True)
+            else:
+                screenshot = context.world.page.screenshot(
+                    type='jpeg', quality=60, full_page=step.step_type == 'then'
+                )
+            image_bytes = loop.run_until_complete(screenshot)
             
-            # Take screenshot
-            loop.run_until_complete(
-                context.world.page.screenshot(path=screenshot_path, full_page=True)
-            )
+            # Write to disk in the background while the next step runs
+            future = context._screen_executor.submit(Path(screenshot_path).write_bytes, image_bytes)
+            context._screen_futures[future] = screenshot_path
             
             # Store screenshot info
             screenshot_info = {
@@ -210,17 +317,14 @@ def after_step_hook(context, step):
                 'status': step.status if hasattr(step, 'status') else 'unknown'
             }
             
+            # Promoted to context.screenshots once in after_scenario
             if not hasattr(context, 'scenario_screenshots'):
                 context.scenario_screenshots = []
             context.scenario_screenshots.append(screenshot_info)
             
-            if not hasattr(context, 'screenshots'):
-                context.screenshots = []
-            context.screenshots.append(screenshot_info)
-            
-            logger.info(f"Screenshot captured for step: {step.name[:50]}")
-            logger.debug(f"Screenshot saved: {screenshot_path}")
+            logger.info("Screenshot captured for step: %s", step.name[:50])
+            logger.debug("Screenshot saved: %s", screenshot_path)
             
         except Exception as error:
-            logger.warning(f"Could not capture screenshot for step: {error}")
+            logger.warning("Could not capture screenshot for step: %s", error)
 
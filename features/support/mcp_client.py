@@ -1,9 +1,13 @@
 """
 MCP Client for test orchestration, dynamic data fetching, and reporting.
 """
+import asyncio
+import atexit
 import json
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from collections import deque
+from typing import Deque, Dict, Any, Optional, List, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -12,11 +16,52 @@ logger = logging.getLogger(__name__)
 class MCPClient:
     """MCP Client for interacting with Model Context Protocol server."""
     
-    def __init__(self):
+    # Process-wide client shared by all scenarios (see acquire/release)
+    _shared: Optional["MCPClient"] = None
+    _shared_lock: Optional[asyncio.Lock] = None
+    _shared_refs = 0
+    _atexit_registered = False
+    
+    # Dynamic data cache: default TTL in seconds, per-type overrides (0 = never
+    # cached) and the maximum number of cached entries
+    DATA_CACHE_TTL = 300
+    DATA_CACHE_TTLS = {"search_keyword": 0}
+    DATA_CACHE_MAX_ENTRIES = 500
+    
+    # Maximum number of test results sent per report_test_results_batch call;
+    # reaching this many queued results also triggers a background flush
+    RESULTS_BATCH_SIZE = 100
+    # Maximum number of test results kept in memory for local reports, and
+    # of results waiting to be sent while the server is unreachable
+    MAX_TEST_RESULTS = 10_000
+    
+    def __init__(self, batch_size: int = 20, max_delay_ms: float = 5, pool_size: int = 1):
         self.client = None
         self.transport = None
         self.connected = False
-        self.test_results: List[Dict[str, Any]] = []
+        
+        # Pool of RPC sessions over the shared transport, used round-robin
+        self.pool_size = max(1, pool_size)
+        self._sessions: List[Any] = []
+        self._next_session = 0
+        # Bounded so long soak runs do not grow without limit
+        self.test_results: Deque[Dict[str, Any]] = deque(maxlen=self.MAX_TEST_RESULTS)
+        # Results not yet sent to the server (see flush_results)
+        self._unreported: List[Dict[str, Any]] = []
+        self._results_flush_task: Optional[asyncio.Task] = None
+        # Set when a flush fails; threshold flushes then wait for shutdown()
+        self._results_flush_failed = False
+        self._dropped_results = 0
+        
+        # Tool calls are queued and sent to the server in batches
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._next_call_id = 0
+        
+        # data_type -> (expiry time, data) for fetch_dynamic_data
+        self._data_cache: Dict[str, Tuple[float, Any]] = {}
     
     async def connect(self):
         """Connect to MCP server."""
@@ -28,10 +73,15 @@ class MCPClient:
             # Placeholder for actual MCP connection
             # from mcp import Client, StdioClientTransport
             # self.transport = StdioClientTransport(...)
-            # self.client = Client(...)
-            # await self.client.connect(self.transport)
+            # for _ in range(self.pool_size):
+            #     session = Client(...)
+            #     await session.connect(self.transport)
+            #     self._sessions.append(session)
+            # self.client = self._sessions[0]
             
             self.connected = True
+            self._queue = asyncio.Queue()
+            self._flush_task = asyncio.create_task(self._flush_loop())
             logger.info("MCP client connected successfully")
         except Exception as error:
             logger.warning(f"MCP client connection failed: {error}")
@@ -40,9 +90,22 @@ class MCPClient:
     
     async def disconnect(self):
         """Disconnect from MCP server."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+            # Send whatever was still queued
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            if pending:
+                await self._send_batch(pending)
+        
         if self.client:
             try:
-                # await self.client.close()
+                # for session in self._sessions:
+                #     await session.close()
+                self._sessions = []
                 self.client = None
                 self.transport = None
                 self.connected = False
@@ -50,10 +113,123 @@ class MCPClient:
             except Exception as error:
                 logger.warning(f"Error disconnecting MCP client: {error}")
     
+    @classmethod
+    async def acquire(cls, pool_size: int = 1) -> "MCPClient":
+        """Get the shared client, connecting it on first use."""
+        if cls._shared_lock is None:
+            cls._shared_lock = asyncio.Lock()
+        async with cls._shared_lock:
+            if cls._shared is None:
+                client = cls(pool_size=pool_size)
+                await client.connect()
+                cls._shared = client
+                # _close_shared always acts on the current client, so one hook is enough
+                if not cls._atexit_registered:
+                    atexit.register(cls._close_shared)
+                    cls._atexit_registered = True
+            cls._shared_refs += 1
+            return cls._shared
+    
+    @classmethod
+    def release(cls):
+        """Release a reference to the shared client; the connection stays open for reuse."""
+        cls._shared_refs = max(0, cls._shared_refs - 1)
+    
+    @classmethod
+    async def shutdown(cls):
+        """Send any queued test results and disconnect the shared client."""
+        client, cls._shared, cls._shared_refs = cls._shared, None, 0
+        if client:
+            await client.flush_results()
+            await client.disconnect()
+    
+    @classmethod
+    def _close_shared(cls):
+        """Drop the shared client at interpreter exit if shutdown() was not called."""
+        if cls._shared:
+            cls._shared.connected = False
+            cls._shared._sessions = []
+            cls._shared.client = None
+            cls._shared = None
+    
+    def get_rpc_session(self) -> Any:
+        """Get the next RPC session from the pool (round-robin)."""
+        if not self._sessions:
+            return self.client
+        session = self._sessions[self._next_session % len(self._sessions)]
+        self._next_session += 1
+        return session
+    
     def is_connected(self) -> bool:
         """Check if MCP client is connected."""
         return self.connected
     
+    async def _call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Queue a tool call and wait for its result.
+        
+        Calls made close together are coalesced into a single "batch" request
+        by the flush loop. Returns None when no transport is available.
+        """
+        if self.client is None or self._queue is None:
+            return None
+        
+        self._next_call_id += 1
+        call = {"id": self._next_call_id, "name": name, "arguments": arguments}
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((call, future))
+        return await future
+    
+    async def _flush_loop(self):
+        """Drain queued tool calls into batches of up to batch_size calls."""
+        loop = asyncio.get_running_loop()
+        batch: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        sending = False
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_delay
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                sending = True
+                await self._send_batch(batch)
+                batch, sending = [], False
+        except asyncio.CancelledError:
+            # Calls already taken off the queue would otherwise never resolve
+            if sending:
+                error = ConnectionError("MCP client disconnected while sending batch")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+            elif batch:
+                await self._send_batch(batch)
+            raise
+    
+    async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Send a batch of tool calls and resolve each caller's future by id."""
+        calls = [call for call, _ in batch]
+        try:
+            response = await self.get_rpc_session().call_tool({
+                "name": "batch",
+                "arguments": {"calls": calls}
+            })
+            results = {item.get("id"): item.get("result") for item in (response or {}).get("results", [])}
+        except Exception as error:
+            logger.error(f"Error sending MCP batch of {len(calls)} calls: {error}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        
+        for call, future in batch:
+            if not future.done():
+                future.set_result(results.get(call["id"]))
+    
     async def start_test_orchestration(self, test_name: str) -> Dict[str, Any]:
         """Start test orchestration via MCP."""
         if not self.connected:
@@ -61,13 +237,9 @@ class MCPClient:
             return {"status": "skipped", "reason": "MCP not connected"}
         
         try:
-            # Example: Call MCP tool for test orchestration
-            # result = await self.client.call_tool({
-            #     "name": "start_test",
-            #     "arguments": {"test_name": test_name}
-            # })
+            await self._call_tool("start_test", {"test_name": test_name})
             logger.info(f"Test orchestration started for: {test_name}")
-            return {"status": "started", "test_name": test_name, "timestamp": datetime.now().isoformat()}
+            return {"status": "started", "test_name": test_name, "timestamp_ns": time.time_ns()}
         except Exception as error:
             logger.error(f"Error in test orchestration: {error}")
             return {"status": "error", "error": str(error)}
@@ -78,12 +250,9 @@ class MCPClient:
             return {"status": "skipped"}
         
         try:
-            # result = await self.client.call_tool({
-            #     "name": "stop_test",
-            #     "arguments": {"test_name": test_name}
-            # })
+            await self._call_tool("stop_test", {"test_name": test_name})
             logger.info(f"Test orchestration stopped for: {test_name}")
-            return {"status": "stopped", "test_name": test_name, "timestamp": datetime.now().isoformat()}
+            return {"status": "stopped", "test_name": test_name, "timestamp_ns": time.time_ns()}
         except Exception as error:
             logger.error(f"Error stopping test orchestration: {error}")
             return {"status": "error", "error": str(error)}
@@ -97,28 +266,37 @@ class MCPClient:
                 return {"keyword": "AI", "source": "default"}
             return {}
         
+        ttl = self.DATA_CACHE_TTLS.get(data_type, self.DATA_CACHE_TTL)
+        cached = self._data_cache.get(data_type)
+        if cached and cached[0] > time.monotonic():
+            logger.debug(f"Using cached dynamic data: {data_type}")
+            return cached[1]
+        
         try:
-            # Example: Fetch dynamic data from MCP
-            # result = await self.client.call_tool({
-            #     "name": "get_test_data",
-            #     "arguments": {"data_type": data_type}
-            # })
             logger.info(f"Fetching dynamic data: {data_type}")
-            
-            # Mock response for demonstration
-            if data_type == "search_keyword":
-                return {"keyword": "AI", "source": "mcp", "timestamp": datetime.now().isoformat()}
-            elif data_type == "validation_criteria":
-                return {
-                    "min_results": 5,
-                    "title_contains": "AI",
-                    "source": "mcp"
-                }
-            
-            return {}
+            data = await self._call_tool("get_test_data", {"data_type": data_type})
+            if data is None:
+                # Mock response for demonstration
+                if data_type == "search_keyword":
+                    data = {"keyword": "AI", "source": "mcp", "timestamp": datetime.now().isoformat()}
+                elif data_type == "validation_criteria":
+                    data = {
+                        "min_results": 5,
+                        "title_contains": "AI",
+                        "source": "mcp"
+                    }
+                else:
+                    data = {}
         except Exception as error:
             logger.error(f"Error fetching dynamic data: {error}")
             return {}
+        
+        if ttl > 0:
+            if data_type not in self._data_cache and len(self._data_cache) >= self.DATA_CACHE_MAX_ENTRIES:
+                # Evict the oldest entry
+                del self._data_cache[next(iter(self._data_cache))]
+            self._data_cache[data_type] = (time.monotonic() + ttl, data)
+        return data
     
     async def report_test_result(self, test_name: str, status: str, 
                                  details: Optional[Dict[str, Any]] = None,
@@ -127,7 +305,7 @@ class MCPClient:
         result = {
             "test_name": test_name,
             "status": status,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp_ns": time.time_ns(),
             "details": details or {}
         }
         
@@ -140,19 +318,74 @@ class MCPClient:
             logger.info(f"Test result logged locally: {test_name} - {status}")
             return {"status": "logged_locally"}
         
-        try:
-            # Example: Send test result to MCP
-            # await self.client.call_tool({
-            #     "name": "report_test_result",
-            #     "arguments": result
-            # })
-            logger.info(f"Test result reported to MCP: {test_name} - {status}")
-            return {"status": "reported", "result": result}
-        except Exception as error:
-            logger.error(f"Error reporting test result: {error}")
-            return {"status": "error", "error": str(error)}
+        # Sent to the server in bulk by flush_results()
+        self._unreported.append(result)
+        self._trim_unreported()
+        if len(self._unreported) >= self.RESULTS_BATCH_SIZE and not self._results_flush_failed and \
+                (self._results_flush_task is None or self._results_flush_task.done()):
+            self._results_flush_task = asyncio.create_task(self.flush_results())
+        logger.info(f"Test result queued for MCP: {test_name} - {status}")
+        return {"status": "queued", "result": result}
+    
+    async def flush_results(self) -> int:
+        """Send all queued test results in batches of RESULTS_BATCH_SIZE.
+        
+        Returns the number of results flushed.
+        """
+        if self._results_flush_task and not self._results_flush_task.done() and \
+                self._results_flush_task is not asyncio.current_task():
+            # Let an in-flight background flush finish first
+            await asyncio.gather(self._results_flush_task, return_exceptions=True)
+        
+        pending, self._unreported = self._unreported, []
+        if not pending:
+            return 0
+        
+        session = self.get_rpc_session()
+        if session is None:
+            logger.debug(f"No MCP transport, dropping {len(pending)} queued results")
+            return len(pending)
+        
+        for start in range(0, len(pending), self.RESULTS_BATCH_SIZE):
+            chunk = pending[start:start + self.RESULTS_BATCH_SIZE]
+            try:
+                await session.call_tool({
+                    "name": "report_test_results_batch",
+                    "arguments": {"results": chunk}
+                })
+            except Exception as error:
+                logger.error(f"Error reporting {len(chunk)} test results: {error}")
+                # Keep unsent results for the final flush in shutdown()
+                self._unreported[:0] = pending[start:]
+                self._trim_unreported()
+                self._results_flush_failed = True
+                return start
+        self._results_flush_failed = False
+        if self._dropped_results:
+            logger.warning(f"Dropped {self._dropped_results} test results while MCP was unreachable")
+            self._dropped_results = 0
+        logger.info(f"Reported {len(pending)} test results to MCP")
+        return len(pending)
+    
+    def _trim_unreported(self):
+        """Drop the oldest unsent results beyond MAX_TEST_RESULTS."""
+        excess = len(self._unreported) - self.MAX_TEST_RESULTS
+        if excess > 0:
+            del self._unreported[:excess]
+            if not self._dropped_results:
+                logger.warning("MCP result queue full, dropping the oldest unsent results")
+            self._dropped_results += excess
     
     def get_test_results(self) -> List[Dict[str, Any]]:
-        """Get all collected test results."""
-        return self.test_results
+        """Get all collected test results, with ISO 8601 timestamps."""
+        return [self._format_result(result) for result in self.test_results]
+    
+    @staticmethod
+    def _format_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace the raw timestamp_ns of a result with a formatted timestamp."""
+        formatted = dict(result)
+        timestamp_ns = formatted.pop("timestamp_ns", None)
+        if timestamp_ns is not None:
+            formatted["timestamp"] = datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+        return formatted
 
@@ -1,15 +1,85 @@
 """
 Custom World class for Behave context management.
 """
+import asyncio
 import logging
+import os
+from functools import cached_property
+from pathlib import Path
+from typing import Optional
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from features.support.mcp_client import MCPClient
 from config.config_manager import ConfigManager
-from utils.test_data_loader import TestDataLoader
-from utils.report_generator import ReportGenerator
 
 logger = logging.getLogger(__name__)
 
+# Cookies/local storage saved from a passing scenario and reused by later
+# contexts (skips consent dialogs); opt in with REUSE_STORAGE_STATE=1
+STORAGE_STATE_FILE = Path(__file__).resolve().parent.parent.parent / '.cache' / 'google_storage_state.json'
+
+# Third-party hosts (ads, analytics) that tests never need
+BLOCKED_HOSTS = ("doubleclick.net", "google-analytics.com", "googletagmanager.com", "gstatic.com/recaptcha")
+# Resource types dropped when media blocking is enabled in config
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+
+def _reuse_storage_state() -> bool:
+    """Check if browser storage state should be persisted and reused."""
+    return os.getenv("REUSE_STORAGE_STATE", "").lower() in ("1", "true", "yes")
+
+
+async def _route_request(route, block_media: bool):
+    """Abort non-essential requests and let everything else through."""
+    request = route.request
+    if (block_media and request.resource_type in BLOCKED_RESOURCE_TYPES) or \
+            any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class BrowserPool:
+    """Launches the browser once per run and shares it across scenarios."""
+    
+    _playwright = None
+    _browser: Optional[Browser] = None
+    _lock: Optional[asyncio.Lock] = None
+    
+    @classmethod
+    async def get(cls, browser_type: str = 'chromium', headed: bool = False) -> Browser:
+        """Get the shared browser, launching it on first use."""
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        async with cls._lock:
+            if cls._browser is None or not cls._browser.is_connected():
+                if cls._playwright is None:
+                    cls._playwright = await async_playwright().start()
+                
+                if browser_type not in ('chromium', 'firefox', 'webkit'):
+                    browser_type = 'chromium'
+                browser_launcher = getattr(cls._playwright, browser_type)
+                
+                cls._browser = await browser_launcher.launch(
+                    headless=not headed,
+                    args=['--no-sandbox', '--disable-dev-shm-usage'] if not headed else []
+                )
+                logger.info(f"Browser launched: {browser_type} (headed={headed})")
+            return cls._browser
+    
+    @classmethod
+    async def close(cls):
+        """Close the shared browser and stop Playwright."""
+        try:
+            if cls._browser:
+                await cls._browser.close()
+            if cls._playwright:
+                await cls._playwright.stop()
+        except Exception as error:
+            logger.error(f"Error closing shared browser: {error}")
+        finally:
+            cls._browser = None
+            cls._playwright = None
+
 
 class CustomWorld:
     """Custom world class extending behave's context."""
@@ -20,13 +90,10 @@ class CustomWorld:
         # Initialize configuration and test data
         env = context.config.userdata.get('environment', 'dev')
         self.config = ConfigManager(environment=env)
-        self.test_data = TestDataLoader()
-        self.report_generator = ReportGenerator()
         
         self.browser: Browser = None
         self.browser_context: BrowserContext = None
         self.page: Page = None
-        self.playwright = None
         self.mcp_client: MCPClient = None
         
         # Configuration from config manager (with fallback to behave.ini)
@@ -34,32 +101,47 @@ class CustomWorld:
         self.browser_type = self.config.get_browser()
         self.base_url = self.config.get_base_url()
     
+    @cached_property
+    def test_data(self):
+        """Test data loader, created on first use."""
+        from utils.test_data_loader import TestDataLoader
+        return TestDataLoader()
+    
+    @cached_property
+    def report_generator(self):
+        """Report generator, created on first use (normally in after_all)."""
+        from utils.report_generator import ReportGenerator
+        return ReportGenerator()
+    
+    async def init(self):
+        """Initialize the browser and MCP client concurrently."""
+        await asyncio.gather(self.init_browser(), self.init_mcp())
+    
     async def init_browser(self):
-        """Initialize Playwright browser."""
+        """Initialize a browser context and page on the shared browser."""
         try:
-            self.playwright = await async_playwright().start()
-            
-            browser_map = {
-                'chromium': self.playwright.chromium,
-                'firefox': self.playwright.firefox,
-                'webkit': self.playwright.webkit
-            }
-            
-            browser_launcher = browser_map.get(self.browser_type, self.playwright.chromium)
-            
-            self.browser = await browser_launcher.launch(
-                headless=not self.headed,
-                args=['--no-sandbox', '--disable-dev-shm-usage'] if not self.headed else []
-            )
+            # The browser is shared; each scenario gets its own context and page
+            self.browser = await BrowserPool.get(self.browser_type, self.headed)
             
             viewport = self.config.get_viewport()
+            context_options = {}
+            if _reuse_storage_state() and STORAGE_STATE_FILE.exists():
+                context_options['storage_state'] = str(STORAGE_STATE_FILE)
             self.browser_context = await self.browser.new_context(
                 viewport=viewport,
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                **context_options
+            )
+            
+            # Playwright passes as many of (route, request) as the handler
+            # declares, so bind block_media in a closure rather than a partial
+            block_media = self.config.should_block_media()
+            await self.browser_context.route(
+                "**/*", lambda route: _route_request(route, block_media)
             )
             
             self.page = await self.browser_context.new_page()
-            logger.info(f"Browser initialized: {self.browser_type} (headed={self.headed})")
+            logger.info(f"Browser context initialized: {self.browser_type} (headed={self.headed})")
         except Exception as error:
             logger.error(f"Error initializing browser: {error}")
             raise
@@ -67,33 +149,45 @@ class CustomWorld:
     async def init_mcp(self):
         """Initialize MCP client."""
         try:
-            self.mcp_client = MCPClient()
-            await self.mcp_client.connect()
+            self.mcp_client = await MCPClient.acquire(pool_size=self.config.get_mcp_pool_size())
             logger.info("MCP client initialized")
         except Exception as error:
             logger.error(f"Error initializing MCP client: {error}")
             # Continue without MCP if initialization fails
             self.mcp_client = None
     
-    async def cleanup(self):
-        """Cleanup browser and MCP connections."""
+    async def cleanup(self, save_state: bool = False):
+        """Cleanup browser and MCP connections.
+        
+        When save_state is True (the scenario passed) and storage state reuse
+        is enabled, the context's cookies are saved for later scenarios.
+        """
+        if save_state and self.browser_context and _reuse_storage_state():
+            try:
+                STORAGE_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+                await self.browser_context.storage_state(path=str(STORAGE_STATE_FILE))
+            except Exception as error:
+                logger.warning(f"Could not save browser storage state: {error}")
+        
         try:
             if self.page:
                 await self.page.close()
-            if self.browser_context:
-                await self.browser_context.close()
-            if self.browser:
-                await self.browser.close()
-            if self.playwright:
-                await self.playwright.stop()
+            # The browser context and MCP release are independent of each other
+            results = await asyncio.gather(
+                self.browser_context.close() if self.browser_context else asyncio.sleep(0),
+                self._release_mcp(),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Error during cleanup: {result}")
+            # The shared browser is closed by BrowserPool.close() in after_all
             logger.info("Browser cleanup completed")
         except Exception as error:
             logger.error(f"Error during browser cleanup: {error}")
-        
-        try:
-            if self.mcp_client:
-                await self.mcp_client.disconnect()
-                logger.info("MCP client cleanup completed")
-        except Exception as error:
-            logger.error(f"Error during MCP cleanup: {error}")
-
+    
+    async def _release_mcp(self):
+        """Release the shared MCP client."""
+        if self.mcp_client:
+            MCPClient.release()
+            logger.info("MCP client cleanup completed")
@@ -1,13 +1,24 @@
 """
 Base Page Object Model class.
 """
+import asyncio
 import logging
+from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 from playwright.async_api import Page, Locator, TimeoutError as PlaywrightTimeoutError
 from config.config_manager import ConfigManager
 
 logger = logging.getLogger(__name__)
 
+_TS_FMT = '%Y%m%d_%H%M%S'
+
+
+@lru_cache(maxsize=64)
+def _domain_slug(url: str) -> str:
+    """Extract the domain of a URL in a filename-safe form."""
+    return url.replace('https://', '').replace('http://', '').split('/')[0].replace('.', '_')
+
 
 class BasePage:
     """Base class for all page objects."""
@@ -17,30 +28,35 @@ class BasePage:
         self.config = config or ConfigManager()
         self.timeout = self.config.get_timeout()
         self.base_url = self.config.get_base_url()
+        # Keeps background screenshot tasks alive until they finish
+        self._screenshot_tasks = set()
     
-    async def navigate(self, url: str = None, wait_until: str = "networkidle", take_screenshot: bool = True):
-        """Navigate to a URL and optionally take a screenshot."""
+    async def navigate(self, url: str = None, wait_until: str = "domcontentloaded", take_screenshot: bool = False):
+        """Navigate to a URL and optionally take a screenshot in the background."""
         target_url = url or self.base_url
         try:
             await self.page.goto(target_url, wait_until=wait_until, timeout=self.timeout)
             logger.info(f"Navigated to {target_url}")
             
-            # Take screenshot after navigation if enabled
+            # Screenshot is captured concurrently so navigation does not wait on it
             if take_screenshot:
-                try:
-                    from datetime import datetime
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    # Extract domain name for filename
-                    domain = target_url.replace('https://', '').replace('http://', '').split('/')[0].replace('.', '_')
-                    screenshot_path = f"reports/screenshots/navigation_{domain}_{timestamp}.png"
-                    await self.page.screenshot(path=screenshot_path, full_page=True)
-                    logger.info(f"Navigation screenshot saved: {screenshot_path}")
-                except Exception as screenshot_error:
-                    logger.warning(f"Could not capture navigation screenshot: {screenshot_error}")
+                timestamp = datetime.now().strftime(_TS_FMT)
+                screenshot_path = f"reports/screenshots/navigation_{_domain_slug(target_url)}_{timestamp}.png"
+                task = asyncio.create_task(self._async_screenshot(screenshot_path))
+                self._screenshot_tasks.add(task)
+                task.add_done_callback(self._screenshot_tasks.discard)
         except Exception as error:
             logger.error(f"Error navigating to {target_url}: {error}")
             raise
     
+    async def _async_screenshot(self, path: str):
+        """Capture a full-page navigation screenshot, logging instead of raising."""
+        try:
+            await self.page.screenshot(path=path, full_page=True)
+            logger.info(f"Navigation screenshot saved: {path}")
+        except Exception as screenshot_error:
+            logger.warning(f"Could not capture navigation screenshot: {screenshot_error}")
+    
     async def wait_for_element(self, selector: str, timeout: int = None) -> Locator:
         """Wait for element to be visible."""
         timeout = timeout or self.timeout
@@ -61,7 +77,6 @@ class BasePage:
     async def fill(self, selector: str, text: str, timeout: int = None):
         """Fill an input field."""
         element = await self.wait_for_element(selector, timeout)
-        await element.clear()
         await element.fill(text)
         logger.debug(f"Filled element {selector} with: {text}")
     
@@ -72,12 +87,18 @@ class BasePage:
         return text.strip() if text else ""
     
     async def is_visible(self, selector: str, timeout: int = None) -> bool:
-        """Check if element is visible."""
+        """Check if element is visible.
+        
+        Without a timeout this checks the current state and returns
+        immediately; with a timeout it waits up to that long to appear.
+        """
+        element = self.page.locator(selector).first
+        if timeout is None:
+            return await element.is_visible()
         try:
-            element = self.page.locator(selector).first
-            await element.wait_for(state='visible', timeout=timeout or 5000)
+            await element.wait_for(state='visible', timeout=timeout)
             return True
-        except:
+        except PlaywrightTimeoutError:
             return False
     
     async def get_title(self) -> str:
@@ -91,8 +112,7 @@ class BasePage:
     async def take_screenshot(self, filename: str = None, full_page: bool = False):
         """Take a screenshot."""
         if not filename:
-            from datetime import datetime
-            filename = f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+            filename = f"screenshot_{datetime.now().strftime(_TS_FMT)}.png"
         
         await self.page.screenshot(path=filename, full_page=full_page)
         logger.info(f"Screenshot saved: {filename}")
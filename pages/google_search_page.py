@@ -1,14 +1,26 @@
 """
 Page Object Model for Google Search page.
 """
+import asyncio
 import logging
-from playwright.async_api import Page, Locator
-from typing import List
+import weakref
+from playwright.async_api import Page, Locator, TimeoutError as PlaywrightTimeoutError
+from typing import Any, Dict, List
 from pages.base_page import BasePage
 from config.config_manager import ConfigManager
 
 logger = logging.getLogger(__name__)
 
+# In-page helpers, each evaluated in a single round-trip
+_HAS_MATCH_JS = "selector => document.querySelector(selector) !== null"
+_TEXTS_JS = """selector => Array.from(document.querySelectorAll(selector))
+    .map(element => (element.textContent || '').trim())
+    .filter(Boolean)"""
+
+# Browser contexts that have already dealt with the consent dialog; cookies
+# persist per context, so later pages in the same context skip the check
+_CONSENTED_CONTEXTS = weakref.WeakSet()
+
 
 class GoogleSearchPage(BasePage):
     """Page Object Model for Google Search."""
@@ -20,31 +32,61 @@ class GoogleSearchPage(BasePage):
     RESULT_TITLES = 'div#search h3, div#search a h3'
     COOKIE_CONSENT = 'button:has-text("Accept"), button:has-text("I agree"), #L2AGLb, button:has-text("Accept all")'
     NEXT_BUTTON = 'a#pnnext'
+    # How long the consent overlay may lag behind the search box (ms)
+    CONSENT_HEAD_START = 500
+    # Union of the result layouts Google serves (comma list == :is())
+    RESULTS_ANY = (
+        'div#search div[data-sokoban-container] > div, div#search div.g, '
+        'div#search div[data-ved], div#search h3, div#rso > div, '
+        'div[data-async-context], div#main > div'
+    )
     
     def __init__(self, page: Page, config: ConfigManager = None):
         super().__init__(page, config)
+        
+        # Locators are lazy and reusable, so build them once per page
+        self._search_box = page.locator(self.SEARCH_BOX).first
+        self._search_results = page.locator(self.SEARCH_RESULTS)
+        self._cookie_button = page.locator(self.COOKIE_CONSENT).first
     
     async def navigate(self, url: str = None):
         """Navigate to Google search page."""
         try:
             target_url = url or self.base_url
-            await super().navigate(target_url, wait_until='networkidle')
+            await super().navigate(target_url)
             
-            # Handle cookie consent if present
+            # Handle cookie consent first; a consent interstitial has no search box
             await self._handle_cookie_consent()
+            
+            # The search box is the only thing the next steps need
+            await self._search_box.wait_for(state='visible', timeout=10000)
         except Exception as error:
             logger.error(f"Error navigating to {target_url}: {error}")
             raise
     
     async def _handle_cookie_consent(self):
         """Handle cookie consent dialog if present."""
+        browser_context = self.page.context
+        if browser_context in _CONSENTED_CONTEXTS:
+            return
+        
         try:
-            # Wait a bit for cookie dialog to appear
-            cookie_button = self.page.locator(self.COOKIE_CONSENT).first
-            if await cookie_button.is_visible(timeout=3000):
-                await cookie_button.click()
-                logger.info("Cookie consent accepted")
-                await self.page.wait_for_timeout(1000)  # Wait for dialog to disappear
+            # Wait for whichever renders first: the consent dialog (or a consent
+            # interstitial) or the search box
+            await self._cookie_button.or_(self._search_box).first.wait_for(state='visible', timeout=3000)
+            
+            # The overlay can render just after the search box underneath it,
+            # so give it a short head start before concluding there is none
+            try:
+                await self._cookie_button.wait_for(state='visible', timeout=self.CONSENT_HEAD_START)
+            except PlaywrightTimeoutError:
+                _CONSENTED_CONTEXTS.add(browser_context)
+                return
+            
+            await self._cookie_button.click()
+            logger.info("Cookie consent accepted")
+            await self._cookie_button.wait_for(state='hidden', timeout=2000)
+            _CONSENTED_CONTEXTS.add(browser_context)
         except Exception as error:
             # Cookie dialog might not be present, which is fine
             logger.debug(f"Cookie consent handling: {error}")
@@ -53,19 +95,18 @@ class GoogleSearchPage(BasePage):
         """Perform a search with the given keyword."""
         try:
             # Wait for search box to be visible
-            search_box = self.page.locator(self.SEARCH_BOX).first
+            search_box = self._search_box
             await search_box.wait_for(state='visible', timeout=10000)
             
-            # Clear and type search keyword
-            await search_box.clear()
+            # fill() replaces any existing value
             await search_box.fill(keyword)
             logger.info(f"Entered search keyword: {keyword}")
             
             # Press Enter or click search button
             await search_box.press('Enter')
             
-            # Wait for search results to load
-            await self.page.wait_for_load_state('networkidle', timeout=15000)
+            # Wait for the results container rather than network idle
+            await self.page.wait_for_selector('div#search', timeout=15000)
             logger.info("Search completed")
         except Exception as error:
             logger.error(f"Error performing search: {error}")
@@ -78,8 +119,8 @@ class GoogleSearchPage(BasePage):
             await self.page.wait_for_selector('div#search', timeout=10000)
             
             # Get all result elements
-            results = self.page.locator(self.SEARCH_RESULTS).all()
-            logger.info(f"Found {len(await self.page.locator(self.SEARCH_RESULTS).count())} search results")
+            results = await self._search_results.all()
+            logger.info(f"Found {len(results)} search results")
             return results
         except Exception as error:
             logger.error(f"Error getting search results: {error}")
@@ -88,8 +129,13 @@ class GoogleSearchPage(BasePage):
     async def are_search_results_displayed(self) -> bool:
         """Check if search results are displayed."""
         try:
-            # Wait for page to stabilize
-            await self.page.wait_for_timeout(3000)
+            # Wait until a results container is in the DOM instead of sleeping
+            try:
+                await self.page.wait_for_function(
+                    "!!document.querySelector('div#search, div#rso')", timeout=5000
+                )
+            except PlaywrightTimeoutError:
+                logger.debug("Search results container did not appear within 5s")
             
             # First check: URL should contain search parameters
             current_url = self.page.url
@@ -97,25 +143,10 @@ class GoogleSearchPage(BasePage):
                 logger.info(f"Search URL detected: {current_url}")
                 # URL indicates search was performed, which is a good sign
             
-            # Try multiple selectors to find search results
-            selectors = [
-                'div#search div[data-sokoban-container] > div',
-                'div#search div.g',
-                'div#search div[data-ved]',
-                'div#search h3',
-                'div#rso > div',
-                'div[data-async-context]',
-                'div#main > div'
-            ]
-            
-            for selector in selectors:
-                try:
-                    count = await self.page.locator(selector).count()
-                    if count > 0:
-                        logger.info(f"Search results found using selector '{selector}': {count} results")
-                        return True
-                except Exception:
-                    continue
+            # Any of the known result layouts, matched in one in-page evaluation
+            if await self.page.evaluate(_HAS_MATCH_JS, self.RESULTS_ANY):
+                logger.info("Search results found")
+                return True
             
             # Fallback: check if search container exists and has content
             search_container = self.page.locator('div#search, div#rso, div#main')
@@ -138,6 +169,13 @@ class GoogleSearchPage(BasePage):
             logger.error(f"Error checking search results: {error}")
             return False
     
+    async def get_search_summary(self) -> Dict[str, Any]:
+        """Get the page title, URL and whether results are displayed, concurrently."""
+        title, displayed = await asyncio.gather(
+            self.get_page_title(), self.are_search_results_displayed()
+        )
+        return {"title": title, "url": self.page.url, "results_displayed": displayed}
+    
     async def get_page_title(self) -> str:
         """Get the page title."""
         try:
@@ -151,12 +189,8 @@ class GoogleSearchPage(BasePage):
     async def get_result_titles(self) -> List[str]:
         """Get titles of all search results."""
         try:
-            titles = []
-            title_elements = self.page.locator(self.RESULT_TITLES).all()
-            for element in title_elements:
-                title_text = await element.text_content()
-                if title_text:
-                    titles.append(title_text.strip())
+            # Collected in-page and returned in a single round-trip
+            titles = await self.page.evaluate(_TEXTS_JS, self.RESULT_TITLES)
             logger.info(f"Retrieved {len(titles)} result titles")
             return titles
         except Exception as error:
@@ -0,0 +1,21 @@
+"""
+Helpers for working with nested dictionaries.
+"""
+from typing import Any, Dict, Mapping, Optional
+
+
+def flatten(data: Mapping[str, Any], prefix: str = "",
+            flat: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Flatten nested mappings into a single dict keyed by dot notation.
+    
+    Intermediate keys are kept as well, so subtrees such as "viewport"
+    remain addressable alongside their leaves ("viewport.width").
+    """
+    if flat is None:
+        flat = {}
+    for key, value in data.items():
+        dotted = f"{prefix}{key}"
+        flat[dotted] = value
+        if isinstance(value, Mapping):
+            flatten(value, f"{dotted}.", flat)
+    return flat
@@ -0,0 +1,14 @@
+"""
+Shared project paths and directory helpers.
+"""
+from functools import cache
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@cache
+def ensure_dir(path: Path) -> Path:
+    """Create a directory (and parents) once per process and return it."""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
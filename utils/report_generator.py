@@ -1,272 +1,366 @@
 """
 Report Generator with timestamp support.
 """
+import asyncio
 import json
 import os
+from collections import Counter, defaultdict
 from datetime import datetime
-from pathlib import Path
-from typing import Dict, Any, List
+from functools import lru_cache
+from html import escape
+from typing import Dict, Any, Iterator, List, Tuple
 import logging
+from utils.json_utils import dumps
+from utils.paths import PROJECT_ROOT, ensure_dir
 
 logger = logging.getLogger(__name__)
 
-
-class ReportGenerator:
-    """Generates test reports with timestamps."""
-    
-    def __init__(self, reports_dir: str = "reports"):
-        self.project_root = Path(__file__).parent.parent
-        self.reports_dir = self.project_root / reports_dir
-        self.reports_dir.mkdir(exist_ok=True)
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.test_results: List[Dict[str, Any]] = []
-    
-    def get_timestamped_filename(self, base_name: str, extension: str = "html") -> str:
-        """Generate filename with timestamp."""
-        return f"{base_name}_{self.timestamp}.{extension}"
-    
-    def generate_html_report(self, test_results: List[Dict[str, Any]], 
-                            feature_name: str = "Test Report",
-                            screenshots: List[Dict[str, Any]] = None) -> str:
-        """Generate HTML report with timestamp."""
-        filename = self.get_timestamped_filename("test_report", "html")
-        filepath = self.reports_dir / filename
-        
-        html_content = self._create_html_content(test_results, feature_name)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        logger.info(f"HTML report generated: {filepath}")
-        return str(filepath)
-    
-    def generate_json_report(self, test_results: List[Dict[str, Any]]) -> str:
-        """Generate JSON report with timestamp."""
-        filename = self.get_timestamped_filename("test_report", "json")
-        filepath = self.reports_dir / filename
-        
-        report_data = {
-            "timestamp": self.timestamp,
-            "generated_at": datetime.now().isoformat(),
-            "test_results": test_results,
-            "summary": self._calculate_summary(test_results)
-        }
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2)
-        
-        logger.info(f"JSON report generated: {filepath}")
-        return str(filepath)
-    
-    def _calculate_summary(self, test_results: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate test summary."""
-        total = len(test_results)
-        passed = sum(1 for r in test_results if r.get("status") == "passed")
-        failed = sum(1 for r in test_results if r.get("status") == "failed")
-        skipped = sum(1 for r in test_results if r.get("status") == "skipped")
-        
-        return {
-            "total": total,
-            "passed": passed,
-            "failed": failed,
-            "skipped": skipped,
-            "pass_rate": round((passed / total * 100) if total > 0 else 0, 2)
-        }
-    
-    def _create_html_content(self, test_results: List[Dict[str, Any]], 
-                            feature_name: str) -> str:
-        """Create HTML content for report."""
-        summary = self._calculate_summary(test_results)
-        
-        html = f"""<!DOCTYPE html>
+# Static parts of the HTML report, built once per process. Dynamic sections
+# are bound str.format methods so only their fields are filled per report.
+_HEAD_FMT = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Test Report - {self.timestamp}</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
+    <title>Test Report - {timestamp}</title>
+""".format
+
+_STYLE_HTML = """    <style>
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             padding: 20px;
             min-height: 100vh;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             background: white;
             border-radius: 10px;
             box-shadow: 0 10px 40px rgba(0,0,0,0.2);
             overflow: hidden;
-        }}
-        .header {{
+        }
+        .header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 30px;
             text-align: center;
-        }}
-        .header h1 {{ font-size: 2.5em; margin-bottom: 10px; }}
-        .header p {{ font-size: 1.1em; opacity: 0.9; }}
-        .timestamp {{
+        }
+        .header h1 { font-size: 2.5em; margin-bottom: 10px; }
+        .header p { font-size: 1.1em; opacity: 0.9; }
+        .timestamp {
             background: rgba(255,255,255,0.2);
             padding: 10px 20px;
             border-radius: 5px;
             display: inline-block;
             margin-top: 10px;
-        }}
-        .summary {{
+        }
+        .summary {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 20px;
             padding: 30px;
             background: #f8f9fa;
-        }}
-        .stat-card {{
+        }
+        .stat-card {
             background: white;
             padding: 20px;
             border-radius: 8px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
             text-align: center;
-        }}
-        .stat-card h3 {{
+        }
+        .stat-card h3 {
             color: #667eea;
             margin-bottom: 10px;
             font-size: 0.9em;
             text-transform: uppercase;
             letter-spacing: 1px;
-        }}
-        .stat-card .number {{
+        }
+        .stat-card .number {
             font-size: 2.5em;
             font-weight: bold;
             color: #333;
-        }}
-        .stat-card.passed .number {{ color: #28a745; }}
-        .stat-card.failed .number {{ color: #dc3545; }}
-        .stat-card.skipped .number {{ color: #ffc107; }}
-        .content {{ padding: 30px; }}
-        .test-result {{
+        }
+        .stat-card.passed .number { color: #28a745; }
+        .stat-card.failed .number { color: #dc3545; }
+        .stat-card.skipped .number { color: #ffc107; }
+        .content { padding: 30px; }
+        .test-result {
             border: 1px solid #e0e0e0;
             border-radius: 8px;
             padding: 20px;
             margin-bottom: 20px;
-        }}
-        .test-result.passed {{ border-left: 4px solid #28a745; }}
-        .test-result.failed {{ border-left: 4px solid #dc3545; }}
-        .test-result.skipped {{ border-left: 4px solid #ffc107; }}
-        .footer {{
+        }
+        .test-result.passed { border-left: 4px solid #28a745; }
+        .test-result.failed { border-left: 4px solid #dc3545; }
+        .test-result.skipped { border-left: 4px solid #ffc107; }
+        .footer {
             background: #f8f9fa;
             padding: 20px;
             text-align: center;
             color: #666;
             border-top: 1px solid #e0e0e0;
-        }}
-        .step-screenshots {{
+        }
+        .step-screenshots {
             margin-top: 20px;
             padding: 15px;
             background: #f8f9fa;
             border-radius: 5px;
-        }}
-        .screenshot-item {{
+        }
+        .screenshot-item {
             margin: 15px 0;
             padding: 10px;
             background: white;
             border-radius: 5px;
             border: 1px solid #e0e0e0;
-        }}
-        .screenshot-image {{
+        }
+        .screenshot-image {
             max-width: 100%;
             height: auto;
             border: 1px solid #ddd;
             border-radius: 5px;
             margin-top: 10px;
             box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">
-        <div class="header">
+"""
+
+_HEADER_FMT = """        <div class="header">
             <h1>🧪 Test Report</h1>
             <p>{feature_name}</p>
-            <div class="timestamp">Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</div>
+            <div class="timestamp">Generated: {generated}</div>
         </div>
         
-        <div class="summary">
+""".format
+
+_SUMMARY_FMT = """        <div class="summary">
             <div class="stat-card">
                 <h3>Total Tests</h3>
-                <div class="number">{summary['total']}</div>
+                <div class="number">{total}</div>
             </div>
             <div class="stat-card passed">
                 <h3>Passed</h3>
-                <div class="number">{summary['passed']}</div>
+                <div class="number">{passed}</div>
             </div>
             <div class="stat-card failed">
                 <h3>Failed</h3>
-                <div class="number">{summary['failed']}</div>
+                <div class="number">{failed}</div>
             </div>
             <div class="stat-card skipped">
                 <h3>Skipped</h3>
-                <div class="number">{summary['skipped']}</div>
+                <div class="number">{skipped}</div>
             </div>
             <div class="stat-card">
                 <h3>Pass Rate</h3>
-                <div class="number">{summary['pass_rate']}%</div>
+                <div class="number">{pass_rate}%</div>
             </div>
         </div>
 
-        <div class="content">
+""".format_map
+
+_CONTENT_OPEN_HTML = """        <div class="content">
             <h2>Test Results</h2>
-            {self._generate_test_results_html(test_results, screenshots)}
+"""
+
+_CONTENT_CLOSE_HTML = """
         </div>
 
-        <div class="footer">
-            <p>Report generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
-            <p>Timestamp: {self.timestamp}</p>
+"""
+
+_FOOTER_FMT = """        <div class="footer">
+            <p>Report generated on: {generated}</p>
+            <p>Timestamp: {timestamp}</p>
         </div>
-    </div>
+""".format
+
+_FOOTER_HTML = """    </div>
 </body>
 </html>"""
-        return html
+
+_RESULT_OPEN_FMT = """
+            <div class="test-result {status}">
+                <h3>{name}</h3>
+                <p><strong>Status:</strong> {status_upper}</p>
+                <p><strong>Duration:</strong> {duration}s</p>
+                <pre>{details}</pre>
+            """.format
+
+_SCREENSHOT_ITEM_FMT = """
+                    <div class='screenshot-item'>
+                        <p><strong>{step_name}</strong></p>
+                        <img src='{relative_path}' alt='{step_name}' class='screenshot-image' />
+                    </div>
+                    """.format
+
+
+def _render_header(feature_name: str, generated: str) -> str:
+    """Render the report header block."""
+    return _HEADER_FMT(feature_name=escape(feature_name), generated=generated)
+
+
+def _render_summary(summary: Dict[str, Any]) -> str:
+    """Render the summary stat cards."""
+    return _SUMMARY_FMT(summary)
+
+
+def _render_footer(generated: str, timestamp: str) -> str:
+    """Render the report footer block."""
+    return _FOOTER_FMT(generated=generated, timestamp=escape(timestamp))
+
+
+class ReportGenerator:
+    """Generates test reports with timestamps."""
+    
+    def __init__(self, reports_dir: str = "reports"):
+        self.project_root = PROJECT_ROOT
+        self.reports_dir = ensure_dir(self.project_root / reports_dir)
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # The timestamp is fixed per instance, so filenames can be memoized
+        self._filename = lru_cache(maxsize=32)(self._format_filename)
+        # Head and stylesheet only depend on the timestamp, so render them once
+        self._head_html = _HEAD_FMT(timestamp=escape(self.timestamp)) + _STYLE_HTML
+        self.test_results: List[Dict[str, Any]] = []
+        # Cached entries hold their results list so its id cannot be reused
+        self._summary_cache: Dict[Tuple[int, int], Tuple[List[Dict[str, Any]], Dict[str, Any]]] = {}
+    
+    def get_timestamped_filename(self, base_name: str, extension: str = "html") -> str:
+        """Generate filename with timestamp."""
+        return self._filename(base_name, extension)
+    
+    def _format_filename(self, base_name: str, extension: str) -> str:
+        """Format a filename with this generator's timestamp."""
+        return f"{base_name}_{self.timestamp}.{extension}"
+    
+    def generate_html_report(self, test_results: List[Dict[str, Any]], 
+                            feature_name: str = "Test Report",
+                            screenshots: List[Dict[str, Any]] = None) -> str:
+        """Generate HTML report with timestamp."""
+        filename = self.get_timestamped_filename("test_report", "html")
+        filepath = self.reports_dir / filename
+        
+        # Write sections as they are rendered instead of joining the whole report
+        with open(filepath, 'w', encoding='utf-8', buffering=1 << 16) as f:
+            f.writelines(self._iter_html_content(test_results, feature_name, screenshots))
+        
+        logger.info(f"HTML report generated: {filepath}")
+        return str(filepath)
+    
+    def generate_json_report(self, test_results: List[Dict[str, Any]],
+                             pretty: bool = False) -> str:
+        """Generate JSON report with timestamp (compact unless pretty is set)."""
+        filename = self.get_timestamped_filename("test_report", "json")
+        filepath = self.reports_dir / filename
+        
+        report_data = {
+            "timestamp": self.timestamp,
+            "generated_at": datetime.now().isoformat(),
+            "test_results": test_results,
+            "summary": self._calculate_summary(test_results)
+        }
+        
+        filepath.write_bytes(dumps(report_data, indent=pretty))
+        
+        logger.info(f"JSON report generated: {filepath}")
+        return str(filepath)
+    
+    async def generate_html_report_async(self, test_results: List[Dict[str, Any]], 
+                                         feature_name: str = "Test Report",
+                                         screenshots: List[Dict[str, Any]] = None) -> str:
+        """Generate HTML report in a worker thread so the event loop keeps running."""
+        return await asyncio.to_thread(self.generate_html_report, test_results,
+                                       feature_name, screenshots)
+    
+    async def generate_json_report_async(self, test_results: List[Dict[str, Any]],
+                                         pretty: bool = False) -> str:
+        """Generate JSON report in a worker thread so the event loop keeps running."""
+        return await asyncio.to_thread(self.generate_json_report, test_results, pretty)
+    
+    def _calculate_summary(self, test_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Calculate test summary, reusing it for the same results list."""
+        total = len(test_results)
+        # Keyed on length too so a list that grew between reports is recounted
+        key = (id(test_results), total)
+        cached = self._summary_cache.get(key)
+        if cached is not None and cached[0] is test_results:
+            return cached[1]
+        
+        counts = Counter(r.get("status", "unknown") for r in test_results)
+        passed = counts["passed"]
+        
+        summary = {
+            "total": total,
+            "passed": passed,
+            "failed": counts["failed"],
+            "skipped": counts["skipped"],
+            "pass_rate": round((passed / total * 100) if total > 0 else 0, 2)
+        }
+        self._summary_cache[key] = (test_results, summary)
+        return summary
+    
+    def _create_html_content(self, test_results: List[Dict[str, Any]], 
+                            feature_name: str,
+                            screenshots: List[Dict[str, Any]] = None) -> str:
+        """Create HTML content for report."""
+        return ''.join(self._iter_html_content(test_results, feature_name, screenshots))
+    
+    def _iter_html_content(self, test_results: List[Dict[str, Any]], 
+                           feature_name: str,
+                           screenshots: List[Dict[str, Any]] = None) -> Iterator[str]:
+        """Yield the HTML report section by section."""
+        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        yield self._head_html
+        yield _render_header(feature_name, now_str)
+        yield _render_summary(self._calculate_summary(test_results))
+        yield _CONTENT_OPEN_HTML
+        yield self._generate_test_results_html(test_results, screenshots)
+        yield _CONTENT_CLOSE_HTML
+        yield _render_footer(now_str, self.timestamp)
+        yield _FOOTER_HTML
     
     def _generate_test_results_html(self, test_results: List[Dict[str, Any]], 
                                     screenshots: List[Dict[str, Any]] = None) -> str:
         """Generate HTML for test results with screenshots."""
-        html = ""
+        # Index screenshots by lowercased scenario and step name so each result
+        # is matched with two dict lookups instead of scanning every screenshot
+        by_scenario: Dict[str, List[int]] = defaultdict(list)
+        by_step: Dict[str, List[int]] = defaultdict(list)
+        for index, screenshot in enumerate(screenshots or ()):
+            by_scenario[screenshot.get('scenario', '').lower()].append(index)
+            by_step[screenshot.get('step', '').lower()].append(index)
+        
+        parts: List[str] = []
+        append = parts.append
         for result in test_results:
             status = result.get("status", "unknown")
             name = result.get("name", "Unknown Test")
             duration = result.get("duration", 0)
             details = result.get("details", {})
             
-            # Find related screenshots
-            step_screenshots = []
-            if screenshots:
-                step_screenshots = [s for s in screenshots if name.lower() in s.get('step', '').lower() or 
-                                  s.get('scenario', '').lower() in name.lower()]
+            # Find related screenshots, keeping their original order
+            name_lc = name.lower()
+            matched = set(by_scenario.get(name_lc, ()))
+            matched.update(by_step.get(name_lc, ()))
+            step_screenshots = [screenshots[i] for i in sorted(matched)]
             
-            html += f"""
-            <div class="test-result {status}">
-                <h3>{name}</h3>
-                <p><strong>Status:</strong> {status.upper()}</p>
-                <p><strong>Duration:</strong> {duration}s</p>
-                <pre>{json.dumps(details, indent=2)}</pre>
-            """
+            append(_RESULT_OPEN_FMT(status=escape(status), name=escape(name),
+                                    status_upper=escape(status.upper()),
+                                    duration=duration,
+                                    details=escape(json.dumps(details, indent=2))))
             
             # Add screenshots if available
             if step_screenshots:
-                html += "<div class='step-screenshots'><h4>Screenshots:</h4>"
+                append("<div class='step-screenshots'><h4>Screenshots:</h4>")
                 for screenshot in step_screenshots:
                     relative_path = screenshot.get('relative_path', screenshot.get('path', ''))
                     step_name = screenshot.get('step', 'Step')
-                    html += f"""
-                    <div class='screenshot-item'>
-                        <p><strong>{step_name}</strong></p>
-                        <img src='{relative_path}' alt='{step_name}' class='screenshot-image' />
-                    </div>
-                    """
-                html += "</div>"
+                    append(_SCREENSHOT_ITEM_FMT(step_name=escape(step_name),
+                                                relative_path=escape(relative_path)))
+                append("</div>")
             
-            html += "</div>"
-        return html
+            append("</div>")
+        return ''.join(parts)
 
@@ -3,9 +3,10 @@ Screenshot Manager for organizing and managing test screenshots.
 """
 import os
 import logging
-from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime
+from html import escape
+from utils.paths import PROJECT_ROOT, ensure_dir
 
 logger = logging.getLogger(__name__)
 
@@ -14,33 +15,59 @@ class ScreenshotManager:
     """Manages screenshots for test steps."""
     
     def __init__(self, screenshots_dir: str = "reports/screenshots"):
-        self.project_root = Path(__file__).parent.parent
-        self.screenshots_dir = self.project_root / screenshots_dir
-        self.screenshots_dir.mkdir(parents=True, exist_ok=True)
-        self.screenshots: List[Dict[str, Any]] = []
+        self.project_root = PROJECT_ROOT
+        self.screenshots_dir = ensure_dir(self.project_root / screenshots_dir)
+        self._root_prefix = str(self.project_root) + os.sep
+        # Column-per-field storage; rows are only built as dicts when requested
+        self._steps: List[str] = []
+        self._step_types: List[str] = []
+        self._scenarios: List[str] = []
+        self._paths: List[str] = []
+        self._relative_paths: List[str] = []
+        self._timestamps: List[str] = []
+        self._statuses: List[str] = []
+        self._by_scenario: Dict[str, List[int]] = {}
+    
+    @property
+    def screenshots(self) -> List[Dict[str, Any]]:
+        """All screenshots as info dicts, in capture order."""
+        return [self._row(i) for i in range(len(self._paths))]
+    
+    def _row(self, index: int) -> Dict[str, Any]:
+        """Build the info dict for the screenshot at index."""
+        return {
+            'step': self._steps[index],
+            'step_type': self._step_types[index],
+            'scenario': self._scenarios[index],
+            'path': self._paths[index],
+            'relative_path': self._relative_paths[index],
+            'timestamp': self._timestamps[index],
+            'status': self._statuses[index]
+        }
     
     def add_screenshot(self, step_name: str, step_type: str, scenario_name: str, 
                       screenshot_path: str, status: str = "passed"):
-        """Add screenshot information."""
-        screenshot_info = {
-            'step': step_name,
-            'step_type': step_type,
-            'scenario': scenario_name,
-            'path': screenshot_path,
-            'relative_path': str(Path(screenshot_path).relative_to(self.project_root)),
-            'timestamp': datetime.now().isoformat(),
-            'status': status
-        }
-        self.screenshots.append(screenshot_info)
-        return screenshot_info
+        """Add screenshot information (paths outside the project are kept as-is)."""
+        index = len(self._paths)
+        self._steps.append(step_name)
+        self._step_types.append(step_type)
+        self._scenarios.append(scenario_name)
+        self._paths.append(screenshot_path)
+        root = self._root_prefix
+        self._relative_paths.append(screenshot_path[len(root):]
+                                    if screenshot_path.startswith(root) else screenshot_path)
+        self._timestamps.append(datetime.now().isoformat())
+        self._statuses.append(status)
+        self._by_scenario.setdefault(scenario_name, []).append(index)
+        return self._row(index)
     
     def get_screenshots_for_scenario(self, scenario_name: str) -> List[Dict[str, Any]]:
         """Get all screenshots for a specific scenario."""
-        return [s for s in self.screenshots if s.get('scenario') == scenario_name]
+        return [self._row(i) for i in self._by_scenario.get(scenario_name, ())]
     
     def get_screenshots_for_step(self, step_name: str) -> List[Dict[str, Any]]:
         """Get all screenshots for a specific step."""
-        return [s for s in self.screenshots if step_name in s.get('step', '')]
+        return [self._row(i) for i, step in enumerate(self._steps) if step_name in step]
     
     def get_all_screenshots(self) -> List[Dict[str, Any]]:
         """Get all screenshots."""
@@ -49,25 +76,35 @@ class ScreenshotManager:
     def generate_screenshot_html(self, screenshots: List[Dict[str, Any]] = None) -> str:
         """Generate HTML for displaying screenshots."""
         if screenshots is None:
-            screenshots = self.screenshots
-        
-        if not screenshots:
-            return "<p>No screenshots available.</p>"
+            # Read our own columns directly rather than building a dict per row
+            if not self._paths:
+                return "<p>No screenshots available.</p>"
+            rows = zip(self._relative_paths, self._steps, self._step_types,
+                       self._statuses, self._timestamps)
+        else:
+            if not screenshots:
+                return "<p>No screenshots available.</p>"
+            rows = ((s.get('relative_path', s.get('path', '')), s.get('step', 'Unknown Step'),
+                     s.get('step_type', ''), s.get('status', 'unknown'), s.get('timestamp', ''))
+                    for s in screenshots)
         
-        html = "<div class='screenshots-container'>"
-        for screenshot in screenshots:
-            relative_path = screenshot.get('relative_path', screenshot.get('path', ''))
-            step_name = screenshot.get('step', 'Unknown Step')
-            step_type = screenshot.get('step_type', '')
-            status = screenshot.get('status', 'unknown')
+        parts = ["<div class='screenshots-container'>"]
+        append = parts.append
+        for relative_path, step_name, step_type, status, timestamp in rows:
+            relative_path = escape(relative_path)
+            step_name = escape(step_name)
+            step_type = escape(step_type)
+            status_upper = escape(status.upper())
+            status = escape(status)
+            timestamp = escape(timestamp)
             
-            html += f"""
+            append(f"""
             <div class='screenshot-item {status}'>
                 <h4>{step_type} {step_name}</h4>
                 <img src='{relative_path}' alt='{step_name}' class='screenshot-image' />
-                <p class='screenshot-info'>Status: {status.upper()} | Time: {screenshot.get('timestamp', '')}</p>
+                <p class='screenshot-info'>Status: {status_upper} | Time: {timestamp}</p>
             </div>
-            """
-        html += "</div>"
-        return html
+            """)
+        append("</div>")
+        return ''.join(parts)
 
@@ -1,10 +1,11 @@
 """
 Test Data Loader for managing test data.
 """
-import json
 import logging
-from pathlib import Path
 from typing import Dict, Any, Optional
+from utils.dict_utils import flatten
+from utils.json_utils import loads
+from utils.paths import PROJECT_ROOT
 
 logger = logging.getLogger(__name__)
 
@@ -13,9 +14,11 @@ class TestDataLoader:
     """Loads and manages test data from JSON files."""
     
     def __init__(self, test_data_dir: str = "test_data"):
-        self.project_root = Path(__file__).parent.parent
+        self.project_root = PROJECT_ROOT
         self.test_data_dir = self.project_root / test_data_dir
         self.test_data: Dict[str, Any] = {}
+        # Dotted-key view of test_data, rebuilt whenever it is (re)loaded
+        self._flat: Dict[str, Any] = {}
         self._load_test_data()
     
     def _load_test_data(self):
@@ -23,8 +26,7 @@ class TestDataLoader:
         try:
             test_data_file = self.test_data_dir / "test_data.json"
             if test_data_file.exists():
-                with open(test_data_file, 'r') as f:
-                    self.test_data = json.load(f)
+                self.test_data = loads(test_data_file.read_bytes())
                 logger.info("Test data loaded successfully")
             else:
                 logger.warning(f"Test data file not found: {test_data_file}")
@@ -32,18 +34,11 @@ class TestDataLoader:
         except Exception as error:
             logger.error(f"Error loading test data: {error}")
             self.test_data = {}
+        self._flat = flatten(self.test_data)
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get test data value by key (supports dot notation)."""
-        keys = key.split('.')
-        value = self.test_data
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-                if value is None:
-                    return default
-            else:
-                return default
+        value = self._flat.get(key)
         return value if value is not None else default
     
     def get_search_keyword(self, keyword_name: str = "ai") -> str: